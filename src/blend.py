@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Numba-compiled pixel kernels for the generator hot path.
+
+PIL'in katman başına ayrı C çağrıları yerine satır bazında paralel (prange)
+tek geçişli döngüler: LLVM otomatik vektörleştirme ile SIMD genişliğinde
+çalışır, GIL'i bypass eder ve ara tampon ayırmaz.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+@njit(parallel=True, fastmath=True, cache=True)
+def composite_over(dst, src):
+    """
+    In-place Porter-Duff "over" blend: src'yi dst üzerine bindirir.
+    Both arrays must be contiguous uint8 of shape (H, W, 4).
+    """
+    h, w = dst.shape[0], dst.shape[1]
+    for y in prange(h):
+        for x in range(w):
+            a = np.uint16(src[y, x, 3])
+            inv = np.uint16(255) - a
+            for c in range(3):
+                dst[y, x, c] = np.uint8((np.uint16(src[y, x, c]) * a + np.uint16(dst[y, x, c]) * inv + 127) // 255)
+            dst[y, x, 3] = np.uint8(255 - (np.uint16(255 - dst[y, x, 3]) * inv + 127) // 255)
+
+@njit(cache=True)
+def build_indices(counts, num, max_attempts_per_item, seed):
+    """
+    Rejection-sample up to `num` unique layer-index combos entirely in nopython
+    mode. counts: katman başına seçenek sayısı (0 = katman yok, indeks -1).
+    Dedup, kombinasyonun mixed-radix rank'i üzerinde paketlenmiş bir uint8
+    bitset ile O(1) yapılır — Python set/tuple/dict overhead'i yok.
+    Returns (picks, made): (num, n_layers) int32 indeks matrisi + üretilen satır sayısı.
+    """
+    np.random.seed(seed)
+    n_layers = counts.shape[0]
+    max_possible = np.int64(1)
+    for k in range(n_layers):
+        if counts[k] > 0:
+            max_possible *= counts[k]
+    bitset = np.zeros((max_possible + 7) // 8, dtype=np.uint8)
+    picks = np.full((num, n_layers), -1, dtype=np.int32)
+    made = 0
+    for _item in range(num):
+        accepted = False
+        for _attempt in range(max_attempts_per_item):
+            rank = np.int64(0)
+            for k in range(n_layers):
+                c = counts[k]
+                if c > 0:
+                    idx = np.random.randint(0, c)
+                    picks[made, k] = np.int32(idx)
+                    rank = rank * c + idx
+                else:
+                    picks[made, k] = -1
+            byte = rank >> 3
+            bit = np.uint8(1 << (rank & 7))
+            if bitset[byte] & bit:
+                continue # collision - try again
+            bitset[byte] |= bit
+            accepted = True
+            break
+        if not accepted:
+            break
+        made += 1
+    return picks, made
+
+@njit(parallel=True, fastmath=True, cache=True)
+def apply_color(mask, color_rgb, out):
+    """
+    Fill the RGBA buffer `out` with color_rgb, taking alpha from the L-mode
+    `mask` array, in a single pass (Image.new + putalpha'nın iki ayrı
+    allocation + sweep'inin yerine geçer).
+    """
+    h, w = mask.shape
+    r, g, b = color_rgb
+    for y in prange(h):
+        for x in range(w):
+            out[y, x, 0] = r
+            out[y, x, 1] = g
+            out[y, x, 2] = b
+            out[y, x, 3] = mask[y, x]
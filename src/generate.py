@@ -9,17 +9,35 @@ Pixel Cat NFT generator — simplified & complete version for your needs.
 """
 
 #*********************************** MASK OLMADANKİ HALİNİ DENE BİR ARA****************************************
+import io
 import os
 import json
+import logging
+import math
 import random
 import hashlib
 import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timezone
-from typing import Dict, List
+from typing import Dict, List, NamedTuple
+import numpy as np
 from PIL import Image
 from tqdm import tqdm
 
+from blend import composite_over, apply_color, build_indices
+
+# orjson (Rust) stdlib json'dan ~5-10x hızlı serialize eder; yoksa stdlib'e düşülür
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Dosya bazlı ayrıntılı log --verbose ile açılır; varsayılan sessiz (NullHandler)
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
 # ----------------------------------------- Utilities -----------------------------------------
 # klasörün varlığını garanti et
 def ensure_dir(p: Path):
@@ -35,10 +53,28 @@ def load_json(path:Path) -> Dict:
 
 # klasör içeriğini filtrele
 def list_images(folder: Path) -> List[str]:
-    if not folder.exists() or not folder.is_dir(): #klasörün içindeki tüm dosya ve klasörleri tek tek döner
+    if not folder.is_dir():
         return []
-    # Filtrelenen dosyaların (png | webp) sadece adlarını (f.name) alır.
-    return [f.name for f in sorted(folder.iterdir()) if f.suffix.lower() in (".png", ".webp")]
+    # os.scandir, iterdir'in aksine Path nesnesi kurmaz ve stat bilgisini
+    # DirEntry üzerinde cache'ler; sadece (png | webp) adları toplanır.
+    with os.scandir(folder) as it:
+        names = [e.name for e in it if e.is_file() and e.name.lower().endswith((".png", ".webp"))]
+    names.sort()
+    return names
+
+# JSON'u diske yaz: varsa orjson (bytes üretir, tek write), yoksa stdlib json
+def dump_json(path: Path, obj) -> None:
+    if orjson is not None:
+        path.write_bytes(orjson.dumps(obj, option=orjson.OPT_INDENT_2))
+    else:
+        with path.open("w", encoding="utf-8") as f:
+            json.dump(obj, f, ensure_ascii=False, indent=2)
+
+# Tek satırlık NDJSON kaydı üret (orjson varsa onunla)
+def json_line(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
 
 # RGB -> HEX
 # "{:02x}" → Bu bir formatlama ifadesi:
@@ -55,57 +91,238 @@ def rgb_from_hex(hexstr):
     return tuple(int(hs[i:i+2], 16) for i in (0,2,4)) #Her parçayı onaltılık sayıdan normal sayıya çevirir, Sonuçları bir tuple içine alır
 
 # ----------------------------------------- Image helpers -----------------------------------------
-def image_to_mask(img: Image.Image, threshold=10) -> Image.Image:
+def image_to_mask(arr: np.ndarray, threshold=10) -> np.ndarray:
     """
-    Return an 'L' mask where area > threshold becomes 255 (paintable).
-    If image has alpha channel, use alpha. Otherwise convert to grayscale and threshold.
+    Return a uint8 mask array where area > threshold becomes 255 (paintable).
+    If the array has an alpha channel, use alpha. Otherwise threshold the
+    grayscale mean. Tek vektörel compare + cast; PIL .point(lambda) turu yok.
     """
-    if "A" in img.getbands(): #şeffaflık (alpha: son kanal) bilgisi var mı? yok mu?
-        alpha = img.split()[-1].convert("L") # Alpha kanalını al ve gri tonlamaya çevir
-        return alpha.point(lambda p: 255 if p > threshold else 0) #point() fonksiyonu, bu işlemi tüm piksellere uygular.
-    gray = img.convert("L")
-    return gray.point(lambda p: 255 if p > threshold else 0)
-
-def color_layer_from_mask(size, mask: Image.Image, color_rgb: tuple) -> Image.Image:
+    if arr.ndim == 3 and arr.shape[-1] == 4:
+        channel = arr[..., 3] #şeffaflık (alpha: son kanal) bilgisi varsa onu kullan
+    elif arr.ndim == 3:
+        channel = arr.mean(-1).astype(np.uint8)
+    else:
+        channel = arr
+    return (channel > threshold).astype(np.uint8) * 255
+
+def load_asset_array(path: Path, resolution: int) -> np.ndarray:
+    """
+    Decode an asset once into an (H,W,4) uint8 RGBA array at the target resolution.
+    PNG decode + convert + resize deterministik olduğu için sonucu cache'lemek güvenli.
+    """
+    img = Image.open(path).convert("RGBA")
+    if img.size != (resolution, resolution):
+        img = img.resize((resolution, resolution), Image.NEAREST)
+    return np.asarray(img)
+
+def load_mask_array(path: Path, resolution: int) -> np.ndarray:
+    """masks/ klasöründeki bir maskeyi L-mode uint8 array olarak decode eder."""
+    img = Image.open(path).convert("L")
+    if img.size != (resolution, resolution):
+        img = img.resize((resolution, resolution), Image.NEAREST)
+    return np.asarray(img)
+
+class Asset(NamedTuple):
+    """Decode edilmiş bir katman görseli + blend kısayolları için alpha özeti."""
+    name: str
+    array: np.ndarray
+    opaque: bool #alpha her yerde 255 -> blend yerine düz kopya yeterli
+    bbox: tuple  #sıfır-olmayan alpha'nın sınırlayıcı kutusu (x0,y0,x1,y1); None = tamamen şeffaf
+    mask: np.ndarray = None #base katmanı için önceden türetilmiş boyama maskesi
+
+def make_asset(name: str, arr: np.ndarray, with_mask: bool = False) -> Asset:
+    alpha = arr[..., 3]
+    return Asset(name, arr,
+                 opaque=bool((alpha == 255).all()),
+                 bbox=Image.fromarray(alpha).getbbox(),
+                 # threshold sabit olduğundan maske asset başına değişmez;
+                 # bir kez burada türetilir, compose her seferinde hazır bulur
+                 mask=image_to_mask(arr) if with_mask else None)
+
+def blend_into(out: np.ndarray, asset: Asset):
     """
-    Create an RGBA image filled with color_rgb where mask is 255 (alpha from mask).
-    Maske görseline göre belirli alanları renklendiren RGBA formatında bir görsel oluşturur.
-    Beyaz (255) olan yerler görünür, siyah (0) olan yerler şeffaf olur.
+    Blend an asset onto `out` in-place, using its alpha summary to skip work:
+    tamamen şeffaf katman atlanır, tamamen opak katman düz kopyaya dönüşür ve
+    kısmi katmanlarda blend yalnızca bbox bölgesinde koşulur.
     """
-    if mask.mode != "L":
-        mask = mask.convert("L")
-    # Belirtilen boyutta, seçilen renkle dolu bir RGBA görsel oluştur
-    # (255,) → alfa kanalı, başlangıçta tam opak
-    color_img = Image.new("RGBA", size, color_rgb + (255,))
-    # Maske görselini alfa (şeffaflık) kanalı olarak uygula
-    color_img.putalpha(mask)
-    # Sonuç olarak sadece maskede beyaz olan yerler renkli görünür
-    return color_img
+    if asset.bbox is None:
+        return
+    if asset.opaque:
+        np.copyto(out, asset.array)
+        return
+    x0, y0, x1, y1 = asset.bbox
+    composite_over(out[y0:y1, x0:x1], asset.array[y0:y1, x0:x1])
 
 # ----------------------------------------- Core generation -----------------------------------------
 # görsel katmanları (layers) toplamak için
-def gather_assets(assets_root: Path, layers_order: List[str]) -> Dict[str, List[str]]:
+def gather_assets(assets_root: Path, layers_order: List[str], resolution: int) -> Dict[str, List[tuple]]:
+    """
+    Collect assets per layer, eagerly decoded to (H,W,4) uint8 arrays at the
+    target resolution. Decode/convert/resize (layer, dosya, çözünürlük) başına
+    deterministik olduğundan burada bir kez yapılır; attempt döngüsü yalnızca
+    hazır array'leri indeksler. Returns {layer: [Asset, ...], "masks": [(name, array), ...]}.
+    """
+    # PIL libpng decode sırasında GIL'i bıraktığı için decode'lar bir thread
+    # havuzunda paralel koşar; büyük asset kütüphanelerinde başlangıç süresi
+    # çekirdek sayısına yakın kısalır.
     assets = {}
-    for layer in layers_order:
-        assets[layer] = list_images(assets_root / layer)
-    # mask folder is special (optional): varsa eklenir, yoksa boş liste olur
-    assets["masks"] = list_images(assets_root / "masks")
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as ex:
+        layer_futs = {}
+        for layer in layers_order:
+            folder = assets_root / layer
+            layer_futs[layer] = [(name, ex.submit(load_asset_array, folder / name, resolution))
+                                 for name in list_images(folder)]
+        # mask folder is special (optional): varsa L-mode array olarak decode edilir
+        mask_folder = assets_root / "masks"
+        mask_futs = [(name, ex.submit(load_mask_array, mask_folder / name, resolution))
+                     for name in list_images(mask_folder)]
+
+        for layer in layers_order:
+            # "base" katmanı için boyama maskesi de cache'e alınır (bkz. compose_item)
+            assets[layer] = [make_asset(name, fut.result(), with_mask=(layer == "base"))
+                             for name, fut in layer_futs[layer]]
+        assets["masks"] = [(name, fut.result()) for name, fut in mask_futs]
     return assets
 
 def compute_max_combinations(assets_map: Dict[str, List[str]], layers_order: List[str]) -> int:
-    counts = [max(1, len(assets_map.get(layer, []))) for layer in layers_order ]
     # If any layer has 0 assets, treat its count as 1 (it will be skipped)
-    total = 1
-    for c in counts:
-        total *= c
-    return total
-
-# rastgele bir öğe seçmek için
-def select_asset_equal(rng: random.Random, choices: List[str]) -> str: #choices: Seçeneklerin listesi. Örneğin: ["blue.png", "green.png", "red.png"]
-    if not choices:
-        return None
-    # Liste doluysa, rastgele bir öğe seç ve döndür
-    return rng.choice(choices)
+    return math.prod(max(1, len(assets_map.get(layer, []))) for layer in layers_order)
+
+def pick_color(rng: np.random.Generator, palette: List[str]) -> tuple:
+    """Paletten ya da rastgele bir RGB seç; (rgb, hex) ikilisi döndürür."""
+    if palette:
+        color_hex = palette[int(rng.integers(len(palette)))]
+        return rgb_from_hex(color_hex), color_hex
+    color_rgb = tuple(int(v) for v in rng.integers(0, 256, size=3))
+    return color_rgb, hex_from_rgb(color_rgb)
+
+def compose_item(assets_map: Dict, layers_order: List[str], resolution: int,
+                 layer_idx: tuple, mask_idx: int, color_rgb: tuple, color_hex: str,
+                 color_scratch: np.ndarray = None) -> tuple:
+    """
+    Compose one NFT from per-layer asset indices (indeks -1 = katman yok).
+    color_scratch verilirse renk katmanı için yeni buffer ayrılmaz, o kullanılır.
+    Returns (selected, out): seçilen dosya adları sözlüğü ve RGBA uint8 çıktı array'i.
+    """
+    selected = {}
+    images = {}
+    for layer, idx in zip(layers_order, layer_idx):
+        if idx >= 0:
+            asset = assets_map[layer][idx]
+            selected[layer] = asset.name
+            images[layer] = asset
+
+    #decide mask: prefer explicit masks folder (cache'ten hazır array gelir)
+    if mask_idx >= 0:
+        mask_name, mask = assets_map["masks"][mask_idx]
+        selected["mask"] = mask_name
+    elif "base" in images:
+        # mask derived from base: cache kurulurken bir kez hesaplandı
+        mask = images["base"].mask
+    else:
+        mask = np.zeros((resolution, resolution), dtype=np.uint8)
+
+    selected["color"] = color_hex
+
+    # Compose: background -> colored body -> cat outline -> other overlays (in order)
+    # blend_into her katmanın alpha özetini kullanarak gereksiz blend'i atlar.
+    if "backgrounds" in images:
+        out = images["backgrounds"].array.copy()
+    else:
+        # alpha=1 (0 değil): Pillow'un tamamen şeffaf canvas'taki patolojik
+        # yavaş yolundan kaçınmak için
+        out = np.full((resolution, resolution, 4), (255, 255, 255, 1), dtype=np.uint8)
+
+    # colored body layer from mask (tek geçişli JIT kernel ile).
+    # apply_color 4 kanalı da doldurduğu için scratch buffer güvenle yeniden kullanılır.
+    if color_scratch is None:
+        color_scratch = np.empty((resolution, resolution, 4), dtype=np.uint8)
+    apply_color(mask, color_rgb, color_scratch)
+    composite_over(out, color_scratch)
+
+    if "cat" in images:
+        blend_into(out, images["cat"])
+
+    # then overlays: after cat in layers_order (outline dan sonra detay katmanları için)
+    after_cat = False
+    for layer in layers_order:
+        if layer == "cat":
+            after_cat = True
+            continue
+        if not after_cat:
+            continue
+        if layer in ("backgrounds","base"):
+            continue
+        if layer in images:
+            blend_into(out, images[layer])
+
+    return selected, out
+
+def write_item(out_dir: Path, i: int, selected: Dict, out: np.ndarray, compress_level: int = 1) -> Dict:
+    """Kabul edilen bir kombonun PNG'sini ve metadata JSON'unu diske yazar."""
+    # on-disk hash sadece kabul edilen kombo için bir kez hesaplanır.
+    # Koleksiyon-içi bir tanımlayıcı olduğu için kriptografik SHA-256 yerine
+    # daha hızlı BLAKE2b yeterli; algoritma metadata'da hash_algo ile belirtilir.
+    combo_str = json.dumps({"selected": selected}, sort_keys=True, ensure_ascii=False)
+    combo_hash = hashlib.blake2b(combo_str.encode(), digest_size=16).hexdigest()
+
+    # save image + metadata (PIL'e dönüş yalnızca kaydetme anında)
+    # Encode önce belleğe (BytesIO) yapılır, dosyaya tek write gider.
+    # Düz renkli piksel art için düşük zlib seviyesi encode süresini ciddi
+    # kısaltır, boyut maliyeti küçüktür; varsayılan compress_level=6 yerine 1.
+    filename = f"nft_{i:06d}.png"
+    logger.debug("Saving: %s", out_dir / filename)
+    buf = io.BytesIO()
+    Image.fromarray(out, "RGBA").save(buf, format="PNG", compress_level=compress_level, optimize=False)
+    (out_dir / filename).write_bytes(buf.getvalue())
+
+    # Metadata için özellikleri (attributes) bir listeye ekle
+    attributes = []
+    for k,v in selected.items():
+        if k == "color":
+            # Renk bilgisi özel bir alan olarak eklenir
+            attributes.append({"trait_type" : "color", "value": v})
+        else:
+            # Diğer katmanlar (örneğin: base, eyes, nose) trait olarak eklenir
+            attributes.append({"trait_type" : k, "value": v})
+
+    metadata = {
+        "name": f"Pixel Cat #{i}",
+        "description": "Programmatically generated Pixel Cat",
+        "image": filename,
+        "edition": i,
+        "attributes": attributes,
+        "hash": combo_hash,
+        "hash_algo": "blake2b-128",
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+    dump_json(out_dir / f"nft_{i:06d}.json", metadata)
+
+    return metadata
+
+# Render worker'larının süreç başına state'i (initializer ile bir kez kurulur).
+_worker_state = {}
+
+def _init_render_worker(assets_map: Dict, layers_order: List[str], resolution: int, out_dir: Path,
+                        compress_level: int = 1):
+    """Her worker sürecinde bir kez çalışır; decode edilmiş asset'leri devralır."""
+    _worker_state["assets_map"] = assets_map
+    _worker_state["layers_order"] = layers_order
+    _worker_state["resolution"] = resolution
+    _worker_state["out_dir"] = out_dir
+    _worker_state["compress_level"] = compress_level
+    # Öğeler arası yeniden kullanılan renk katmanı buffer'ı (süreç başına bir tane)
+    _worker_state["color_scratch"] = np.empty((resolution, resolution, 4), dtype=np.uint8)
+
+def _render_task(task: tuple) -> Dict:
+    """Tek bir kabul edilmiş komboyu compose edip diske yazar; metadata döndürür."""
+    i, layer_idx, mask_idx, color_rgb, color_hex = task
+    st = _worker_state
+    selected, out = compose_item(st["assets_map"], st["layers_order"], st["resolution"],
+                                 layer_idx, mask_idx, color_rgb, color_hex,
+                                 color_scratch=st["color_scratch"])
+    return write_item(st["out_dir"], i, selected, out, st["compress_level"])
 
 def generate_collection(
         assets_root: Path, #Ana varlık (assets) klasörünün yolu
@@ -116,8 +333,11 @@ def generate_collection(
         resolution: int = 400, #Üretilen görüntülerin piksel cinsinden kare boyutu.
         seed: int = None, #her çalışmada farklı rastgelelik
         palette: List[str] = None, #rastgele RGB renkler üretilir
-        max_attempts_per_item: int = 200 #Her öğe için benzersiz bir kombinasyon yakalanana kadar yapılacak deneme sayısı sınırı.
+        max_attempts_per_item: int = 200, #Her öğe için benzersiz bir kombinasyon yakalanana kadar yapılacak deneme sayısı sınırı.
         # Çakışma (aynı kombinasyonun tekrar üretilmesi) olursa yeniden deniyor; bu parametre sonsuz döngüyü önler.
+        workers: int = None, #compose+encode+save için paralel süreç sayısı (None = çekirdek sayısı)
+        compress_level: int = 1, #PNG zlib seviyesi; 1 = hızlı encode, küçük boyut maliyeti
+        pretty_index: bool = False #NDJSON index'e ek olarak girintili metadata_index.json da yaz
 ):
     """
     çıktı klasörünü hazırlar, rastgelelik kaynağını başlatır, varlıkları toplar, olası benzersiz kombinasyon sayısını
@@ -125,7 +345,10 @@ def generate_collection(
     """
     ensure_dir(out_dir) #out_dir klasörünü oluşturursa oluşturur, varsa hata vermez.
     rng_global = random.Random(seed)
-    assets_map = gather_assets(assets_root,layers_order)
+    # Öğe başına bir kez spawn'lanan ucuz PCG64 akışları: attempt başına
+    # MT19937 kurmanın (binlerce karıştırma op'u) maliyetini ortadan kaldırır.
+    streams = np.random.SeedSequence(seed).spawn(max(num, 1))
+    assets_map = gather_assets(assets_root, layers_order, resolution)
     max_possible = compute_max_combinations(assets_map, layers_order)
     print(f"Detected assets (per layer):")
     for layer in layers_order:
@@ -138,147 +361,122 @@ def generate_collection(
     if num + start_id - 1 > max_possible:
         print(f"WARNING: Requested {num} items but only {max_possible} unique combinations possible. Will generate at most {max_possible - (start_id - 1)} items.")
 
-    # Daha önce üretilen kombinasyonların özet hashlerini saklar.
-    seen_hashes = set()
-    # Her üretilen öğe için oluşturulan metadata sözlüklerini toplar. Sonunda index dosyası olarak kaydedilir.
-    metadata_list = []
-    generated = 0
+    # Daha önce üretilen kombinasyonların indeks tuple'larını saklar.
+    # Tuple zaten hashlenebilir; attempt başına JSON + SHA256 turu gerekmez.
+    seen_keys = set()
+    # Seçim aşamasında kabul edilen kombolar; render aşaması bunları işler.
+    # Her görev: (edition id, layer_idx, mask_idx, color_rgb, color_hex)
+    tasks = []
     target = num
     i = start_id
 
-    # toplam ilerleme hedefini belirler.
-    pbar = tqdm(total=min(target, max_possible - (start_id - 1)), desc="Generating")
-
-    # Üretilecek hedefe ulaşılmadıysa ve hâlâ benzersiz kombinasyon üretilebiliyorsa devam et
-    while generated < target and (i - start_id) < max_possible:
-        attempts = 0
-        made = False
-
-        # Bu öğe için benzersiz kombinasyon bulmak üzere denemelere başla
-        while attempts < max_attempts_per_item:
-            attempts += 1
-            # Her deneme için farklı ama kontrollü rastgelelik üret
-            rng = random.Random((seed or 0)^ i ^ attempts)
-            # Seçilen varlıklar ve açılan görselleri tutacak yapılar
-            selected={}
-            images={}
-
-            # choose asset per layer equally (Her katman için eşit olasılıkla bir görsel seç)
-            for layer in layers_order:
-                choices = assets_map.get(layer, []) # Katmana ait görsellerin listesi
-                chosen = select_asset_equal(rng, choices) if choices else None  # Rastgele seçim yap
-                if chosen:
-                    selected[layer] = chosen  # Seçilen dosya adını kaydet
-                    img = Image.open(assets_root / layer / chosen).convert("RGBA") # Görseli aç ve RGBA formatına çevir
-                    if img.size != (resolution, resolution):
-                        img = img.resize((resolution, resolution), Image.NEAREST)
-                    images[layer]=img # Görseli katmanlar sözlüğüne ekle
-
-            #decide mask: prefer explicit masks folder
-            mask = None
-            if assets_map.get("masks"):
-                mask_choice = select_asset_equal(rng, assets_map["masks"])
-                mask = Image.open(assets_root / "masks" / mask_choice).convert("L")
-                if mask.size != (resolution,resolution):
-                    mask = mask.resize((resolution, resolution), Image.NEAREST)
-                selected["mask"] = mask_choice
-            else:
-                # derive mask from base if exists
-                if "base" in images:
-                    mask = image_to_mask(images["base"])
-                else:
-                    mask = Image.new("L", (resolution, resolution), 0)
-
-            # choose color: from palette if provided else random
-            if palette:
-                color_hex = rng.choice(palette)
-                color_rgb = rgb_from_hex(color_hex)
-            else:
-                color_rgb = (rng.randint(0,255), rng.randint(0,255), rng.randint(0,255))
-                color_hex = hex_from_rgb(color_rgb)
-            selected["color"] = color_hex
-
-            # Compose: background -> colored body -> cat outline -> other overlays (in order)
-            # start canvas
-            if "backgrounds" in images:
-                canvas = images["backgrounds"].copy()
-            else:
-                canvas = Image.new("RGBA", (resolution, resolution), (255,255,255,0))
-
-            # colored body layer from mask
-            color_layer = color_layer_from_mask((resolution,resolution), mask, color_rgb)
-            canvas = Image.alpha_composite(canvas,color_layer)
-
-            if "cat" in images:
-                canvas= Image.alpha_composite(canvas,images["cat"])
-
-            # then overlays: after cat in layers_order (outline dan sonra detay katmanları için)
-            after_cat = False
-            for layer in layers_order:
-                if layer == "cat":
-                    after_cat = True
-                    continue
-                if not after_cat:
-                    continue
-                if layer in ("backgrounds","base"):
-                    continue
-                if layer in images:
-                    canvas = Image.alpha_composite(canvas, images[layer])
-
-            # uniqueness hash
-            combo_obj = {"selected": selected}
-            combo_str = json.dumps(combo_obj, sort_keys=True, ensure_ascii=False)
-            combo_hash = hashlib.sha256(combo_str.encode()).hexdigest()
-            if combo_hash in seen_hashes:
-                # collision - try again
-                continue
-            seen_hashes.add(combo_hash)
-
-            # save image + metadata
-            filename = f"nft_{i:06d}.png"
-            print("Saving:", out_dir / filename)
-            canvas.save(out_dir / filename)
-
-            # Metadata için özellikleri (attributes) bir listeye ekle
-            attributes = []
-            for k,v in selected.items():
-                if k == "color":
-                    # Renk bilgisi özel bir alan olarak eklenir
-                    attributes.append({"trait_type" : "color", "value": v})
-                else:
-                    # Diğer katmanlar (örneğin: base, eyes, nose) trait olarak eklenir
-                    attributes.append({"trait_type" : k, "value": v})
-
-            metadata = {
-                "name": f"Pixel Cat #{i}",
-                "description": "Programmatically generated Pixel Cat",
-                "image": filename,
-                "edition": i,
-                "attributes": attributes,
-                "hash": combo_hash,
-                "generated_at": datetime.now(timezone.utc).isoformat(),
-            }
-
-            with open(out_dir / f"nft_{i:06d}.json", "w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
-
-            metadata_list.append(metadata)
-            generated += 1
+    # -------- Selection phase: ucuz, seri ve deterministik --------
+    if num + start_id - 1 > max_possible * 0.3:
+        # Yüksek doluluk oranı: rejection sampling kupon-koleksiyoncusu gibi
+        # kuadratik boşa deneme yapar. Tüm kartezyen çarpımı üretip karıştırmak
+        # hem O(max_possible) hem de benzersizliği garanti eder.
+        dims = [range(len(assets_map[layer])) if assets_map.get(layer) else (-1,)
+                for layer in layers_order]
+        combos = list(itertools.product(*dims))
+        rng_global.shuffle(combos)
+        for layer_idx in combos:
+            if len(tasks) >= target:
+                break
+            # Maske ve renk kombo başına rastgele kalır; katman tuple'ı zaten benzersiz
+            rng = np.random.Generator(np.random.PCG64(streams[len(tasks)]))
+            mask_idx = int(rng.integers(len(assets_map["masks"]))) if assets_map.get("masks") else -1
+            color_rgb, color_hex = pick_color(rng, palette)
+            seen_keys.add(layer_idx + (mask_idx, color_rgb))
+
+            tasks.append((i, layer_idx, mask_idx, color_rgb, color_hex))
             i += 1
-            made = True
-            pbar.update(1)
-            break
-
-        if not made:
+    elif (max_possible + 7) // 8 <= (1 << 24):
+        # Seçim döngüsü tamamen nopython'da koşar: indeks çekimi + bitset dedup,
+        # Python set/tuple overhead'i olmadan. Bitset max_possible bit tuttuğu
+        # için bu yol yalnızca ~16 MiB'a kadar olan kombinasyon uzaylarında
+        # kullanılır; dedup katman rank'i üzerindedir (maske/renk sonradan
+        # atanır, katman tuple'ı benzersiz olduğundan öğeler yine benzersizdir).
+        counts = np.array([len(assets_map.get(layer, [])) for layer in layers_order], dtype=np.int64)
+        limit = min(target, max_possible - (start_id - 1))
+        njit_seed = int(np.random.SeedSequence(seed).generate_state(1)[0])
+        picks, made_rows = build_indices(counts, limit, max_attempts_per_item, njit_seed)
+        if made_rows < limit:
             # couldn't find a unique combo for this index after attempts
-            print(f"Could not produce unique item for id={i} after {max_attempts_per_item} attempts. Stopping..")
-            break
-
+            print(f"Could not produce unique item for id={start_id + made_rows} after {max_attempts_per_item} attempts. Stopping..")
+        for row in picks[:made_rows]:
+            rng = np.random.Generator(np.random.PCG64(streams[len(tasks)]))
+            mask_idx = int(rng.integers(len(assets_map["masks"]))) if assets_map.get("masks") else -1
+            color_rgb, color_hex = pick_color(rng, palette)
+            tasks.append((i, tuple(int(v) for v in row), mask_idx, color_rgb, color_hex))
+            i += 1
+    else:
+        # Üretilecek hedefe ulaşılmadıysa ve hâlâ benzersiz kombinasyon üretilebiliyorsa devam et
+        while len(tasks) < target and (i - start_id) < max_possible:
+            attempts = 0
+            made = False
+            # Öğe başına tek akış; retry'lar aynı akıştan taze değer çeker —
+            # unbiased rejection sampling için zaten istenen davranış bu.
+            rng = np.random.Generator(np.random.PCG64(streams[len(tasks)]))
+
+            # Bu öğe için benzersiz kombinasyon bulmak üzere denemelere başla
+            while attempts < max_attempts_per_item:
+                attempts += 1
+
+                # choose asset per layer equally (Her katman için eşit olasılıkla bir indeks seç)
+                layer_idx = tuple(int(rng.integers(len(assets_map[layer]))) if assets_map.get(layer) else -1
+                                  for layer in layers_order)
+                mask_idx = int(rng.integers(len(assets_map["masks"]))) if assets_map.get("masks") else -1
+                color_rgb, color_hex = pick_color(rng, palette)
+
+                # uniqueness key: küçük bir indeks tuple'ı kombonun kendisini tanımlar
+                combo_key = layer_idx + (mask_idx, color_rgb)
+                if combo_key in seen_keys:
+                    # collision - try again
+                    continue
+                seen_keys.add(combo_key)
+
+                tasks.append((i, layer_idx, mask_idx, color_rgb, color_hex))
+                i += 1
+                made = True
+                break
+
+            if not made:
+                # couldn't find a unique combo for this index after attempts
+                print(f"Could not produce unique item for id={i} after {max_attempts_per_item} attempts. Stopping..")
+                break
+
+    # -------- Render phase: her görev bağımsız (compose + PNG encode + yazma) --------
+    # PNG encode (zlib DEFLATE) CPU-ağırlıklı ve GIL altında tek iş parçacıklı;
+    # süreç havuzu fiziksel çekirdek sayısına yakın ölçeklenir.
+    if workers is None:
+        workers = os.cpu_count() or 1
+    generated = 0
+    pbar = tqdm(total=len(tasks), desc="Generating")
+    # Index, öğe tamamlandıkça NDJSON olarak akıtılır: tüm metadata'yı bellekte
+    # biriktirip sonda tek seferde dump etmek yerine peak bellek O(1) kalır.
+    index_path = out_dir / "metadata_index.ndjson"
+    with open(index_path, "wb") as idx_f:
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     initializer=_init_render_worker,
+                                     initargs=(assets_map, layers_order, resolution, out_dir, compress_level)) as ex:
+                for metadata in ex.map(_render_task, tasks):
+                    idx_f.write(json_line(metadata))
+                    generated += 1
+                    pbar.update(1)
+        else:
+            _init_render_worker(assets_map, layers_order, resolution, out_dir, compress_level)
+            for task in tasks:
+                idx_f.write(json_line(_render_task(task)))
+                generated += 1
+                pbar.update(1)
     pbar.close()
 
-    # write index
-    with open(out_dir / "metadata_index.json", "w", encoding="utf-8") as f:
-        json.dump(metadata_list, f, ensure_ascii=False, indent=2)
+    # İstenirse eski biçimli girintili index NDJSON'dan türetilir (ikinci
+    # serialization yalnızca bu bayrakla ödenir).
+    if pretty_index:
+        with open(index_path, "r", encoding="utf-8") as f:
+            dump_json(out_dir / "metadata_index.json", [json.loads(line) for line in f])
 
     print(f"Done. Generated {generated} items. Files saved to: {out_dir}")
 
@@ -292,8 +490,15 @@ def main():
     parser.add_argument("--start", type=int, default=1, help="start edition number")
     parser.add_argument("--resolution", type=int, default=None, help="output resolution (overrides config)")
     parser.add_argument("--seed", type=int, default=None, help="random seed (optional)")
+    parser.add_argument("--workers", type=int, default=None, help="parallel render processes (default: cpu count)")
+    parser.add_argument("--compress-level", type=int, default=1, help="PNG zlib compression level 0-9 (default 1, fast)")
+    parser.add_argument("--verbose", action="store_true", help="log each saved file (tqdm ile karışmaması için varsayılan kapalı)")
+    parser.add_argument("--pretty-index", action="store_true", help="also write an indented metadata_index.json")
     # Tüm argümanları parse edip `args` nesnesine aktarır
     args = parser.parse_args()
+
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG, format="%(message)s")
     """
     Bu yapı sayesinde terminalden şöyle komutlar verebilirsin:
         `python generate.py --assets my_assets --num 50 --resolution 400 --seed 42`
@@ -321,6 +526,9 @@ def main():
         resolution=resolution,
         seed=args.seed,
         palette=palette,
+        workers=args.workers,
+        compress_level=args.compress_level,
+        pretty_index=args.pretty_index,
     )
 
 """KODU AŞAĞIDAKİ GİBİ ÇALIŞTIRMA SEBEBİ: